@@ -1,10 +1,25 @@
 import re
-import time
+import heapq
 import logging
-import hashlib
-from urllib.parse import urlparse, urljoin, urldefrag, urlunparse, parse_qs, unquote
-from collections import defaultdict
-from bs4 import BeautifulSoup
+from functools import lru_cache
+import xxhash
+from pybloom_live import ScalableBloomFilter
+from urllib.parse import urlparse, urljoin, parse_qs, unquote
+from collections import defaultdict, Counter
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml is much faster than the pure-Python parser; fall back if it is missing.
+try:
+    import lxml  # noqa: F401
+    _HTML_PARSER = "lxml"
+except ImportError:
+    _HTML_PARSER = "html.parser"
+
+# Hyperscan matches all URL trap patterns in a single pass; optional.
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
 
 # for tokenizing and computing frequencies
 from tokenizer import Tokenizer
@@ -14,21 +29,47 @@ from tokenizer import STOPWORDS as stopwords
 MIN_HTML_SIZE = 1024
 LARGE_PAGE_THRESHOLD = 5 * 1024 * 1024  # 5 MB threshold.
 MIN_WORD_COUNT = 50                    # skip pages with fewer than 50 words.
-SCRAPER_DELAY = 0.001 # additional politeness
 
 # --- Logging configuration ---
 logging.basicConfig(filename="output.log", level=logging.INFO,
                     format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# --- URL filtering patterns ---
+_ALLOWED_DOMAINS = frozenset({"ics.uci.edu", "cs.uci.edu", "informatics.uci.edu", "stat.uci.edu"})
+# Leading dot so that e.g. "evilics.uci.edu" does not pass as a subdomain.
+_ALLOWED_SUFFIXES = tuple("." + domain for domain in _ALLOWED_DOMAINS)
+_TRAP_KEYWORDS = ("calendar", "ical", "archive", "revisions", "feed")
+_TRAP_KEYWORDS_RE = re.compile("|".join(map(re.escape, _TRAP_KEYWORDS)))
+# Detect "/YYYY-MM" or "/YYYY-MM-DD" anywhere in the URL (path or query).
+# ASCII word/digit rules, so the re and Hyperscan checks agree.
+_TRAP_DATE_RE = re.compile(r'\b\d{4}-\d{2}(?:-\d{2})?\b', re.ASCII)
+_TRAP_FILTER = "?filter%"  # block filtering queries
+# File extensions that do not point to a webpage.
+_EXT_SET = frozenset({
+    "css", "js", "bmp", "gif", "jpg", "jpeg", "ico",
+    "png", "tif", "tiff", "mid", "mp2", "mp3", "mp4",
+    "wav", "avi", "mov", "mpeg", "ram", "m4v", "mkv", "ogg", "ogv", "pdf",
+    "ps", "eps", "tex", "ppt", "pptx", "doc", "docx", "xls", "xlsx", "names",
+    "data", "dat", "exe", "bz2", "tar", "msi", "bin", "7z", "psd", "dmg", "iso",
+    "epub", "dll", "cnf", "tgz", "sha1",
+    "thmx", "mso", "arff", "rtf", "jar", "csv",
+    "rm", "smil", "wmv", "swf", "wma", "zip", "rar", "gz"})
+
+# Link extraction on its own only needs anchors (and <base> to resolve them);
+# skip building the rest of the tree.
+_A_STRAINER = SoupStrainer(["a", "base"], href=True)
 
 # --- Global state for duplicate detection and statistics ---
-PAGE_CHECKSUMS = set()
+# Bloom filter keeps memory bounded; checksum dedup is already probabilistic.
+PAGE_CHECKSUMS = ScalableBloomFilter(initial_capacity=10000, error_rate=0.001)
 
 class CrawlerStats:
     def __init__(self):
         self.unique_urls = set()
         self.longest_page = {"words": 0, "url": ""}
         self.ics_subdomains = defaultdict(int)
-        self.frequent_words = defaultdict(int)
+        self.frequent_words = Counter()
 
     def update_unique_urls(self, url: str):
         self.unique_urls.add(url)
@@ -39,19 +80,17 @@ class CrawlerStats:
             self.longest_page["url"] = url
 
     def check_and_update_ics_domain(self, url: str):
-        parsed = urlparse(url)
+        parsed = _cached_parse(url)
         if parsed.netloc == "ics.uci.edu":
             self.ics_subdomains[parsed.netloc] += 1
 
     def update_frequent_words(self, tokens: list):
-        freqs = tk.compute_word_frequencies(tokens)
-        for token, count in freqs.items():
-            if token not in stopwords:
-                self.frequent_words[token] += count
+        self.frequent_words.update(token for token in tokens if token not in stopwords)
 
     def get_top_50_words(self):
-        sorted_items = sorted(self.frequent_words.items(), key=lambda item: (-item[1], item[0]))
-        return [word for word, _ in sorted_items[:50]]
+        # heap selection instead of sorting the whole vocabulary; ties stay alphabetical.
+        top_items = heapq.nsmallest(50, self.frequent_words.items(), key=lambda item: (-item[1], item[0]))
+        return [word for word, _ in top_items]
 
     def get_final_statistics(self):
         return {
@@ -66,52 +105,106 @@ stats = CrawlerStats()
 tk = Tokenizer()
 
 # --- Helper Functions ---
+@lru_cache(maxsize=4096)
+def _cached_parse(url: str):
+    """Memoized urlparse; a link is parsed when extracted and again when crawled."""
+    return urlparse(url)
+
 def _normalize_url(url: str) -> str:
     """Remove trailing slashes from the path to normalize the URL."""
-    parsed = urlparse(url)
-    normalized = urlunparse((
-        parsed.scheme,
-        parsed.netloc,
-        parsed.path.rstrip("/"),
-        parsed.params,
-        parsed.query,
-        parsed.fragment
-    ))
+    # The path ends at the first "?" or "#"; no need for a full parse/unparse.
+    cut = len(url)
+    for sep in "?#":
+        index = url.find(sep, 0, cut)
+        if index != -1:
+            cut = index
+    head, rest = url[:cut], url[cut:]
+
+    # Split "scheme://netloc" from the path, and ";params" off the last segment.
+    authority = head.find("//")
+    path_start = head.find("/", authority + 2) if authority != -1 else 0
+    if path_start == -1:
+        path_start = len(head)
+    prefix, path = head[:path_start], head[path_start:]
+    semi = path.find(";", path.rfind("/") if "/" in path else 0)
+    params = ""
+    if semi != -1:
+        path, params = path[:semi], path[semi:]
+        if len(params) == 1:
+            params = ""  # urlunparse drops an empty ";"
+
+    path = path.rstrip("/")
+    if params and not path and authority != -1:
+        path = "/"  # urlunparse keeps "/" before params on an empty path
+
+    # Likewise drop an empty "?" or "#".
+    query, _, fragment = rest.partition("#")
+    normalized = prefix + path + params
+    if len(query) > 1:
+        normalized += query
+    if fragment:
+        normalized += "#" + fragment
     return normalized
 
-def _get_soup(resp) -> BeautifulSoup:
-    """Return a BeautifulSoup object for the response content."""
-    return BeautifulSoup(resp.raw_response.content, "html.parser")
-
-import re
-
-def _is_trap_url(url: str) -> bool:
-  """Check whether a URL is a trap based on keywords, url patterns, or if there is a date trap pattern or filters"""
-    lower_url = url.lower()
-    parsed_url = urlparse(url)
-    query_params = parse_qs(parsed_url.query)
-
-    # Trap Keywords
-    trap_keywords = ["calendar", "ical", "archive", "revisions", "feed"]
-    if any(keyword in lower_url for keyword in trap_keywords):
-        return True
-
-    # Detect "/YYYY-MM" or "/YYYY-MM-DD" anywhere in the URL (path or query)
-    date_trap_pattern = re.compile(r'\b\d{4}-\d{2}(-\d{2})?\b')
-    if date_trap_pattern.search(lower_url):
-        return True
-
-    # Check query parameters for encoded date patterns
-    for param, values in query_params.items():
+def _get_soup(html_content) -> BeautifulSoup:
+    """Return a BeautifulSoup object for the page content."""
+    return BeautifulSoup(html_content, _HTML_PARSER)
+
+def _iter_hrefs(soup: BeautifulSoup):
+    """Yield the raw href of every <a href> in the page."""
+    for tag in soup.find_all("a", href=True):
+        href = tag.get("href")
+        if href:
+            yield href
+
+def _compile_trap_db():
+    """Compile the keyword, date and filter trap checks into one Hyperscan database."""
+    expressions = [_TRAP_KEYWORDS_RE.pattern, _TRAP_DATE_RE.pattern, re.escape(_TRAP_FILTER)]
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[expression.encode("utf-8") for expression in expressions],
+        ids=list(range(len(expressions))),
+        elements=len(expressions),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions))
+    return db
+
+_TRAP_DB = _compile_trap_db() if hyperscan is not None else None
+
+def _on_trap_match(pattern_id, start, end, flags, matches):
+    matches.append(pattern_id)
+
+def _is_trap_url(url: str, parsed) -> bool:
+    """Check whether a URL is a trap based on keywords, url patterns, or if there is a date trap pattern or filters"""
+    if _TRAP_DB is not None:
+        # Keywords, dates and filter queries in one scan.
+        matches = []
+        _TRAP_DB.scan(url.encode("utf-8"), match_event_handler=_on_trap_match, context=matches)
+        if matches:
+            return True
+    else:
+        lower_url = url.lower()
+
+        # Trap Keywords
+        if _TRAP_KEYWORDS_RE.search(lower_url):
+            return True
+
+        # Date-based URLs
+        if _TRAP_DATE_RE.search(url):
+            return True
+
+        # block filtering queries
+        if _TRAP_FILTER in lower_url:
+            return True
+
+    # Check query parameters for encoded date patterns; a date needs digits.
+    query = parsed.query
+    if not any(c.isdigit() for c in query):
+        return False
+    for values in parse_qs(query).values():
         for value in values:
-            decoded_value = unquote(value)
-            if date_trap_pattern.search(decoded_value):
+            if _TRAP_DATE_RE.search(unquote(value)):
                 return True
 
-    # block filtering queries
-    if "?filter%" in lower_url:
-        return True
-
     return False
 
 # --- Main Functions ---
@@ -121,46 +214,44 @@ def scraper(url, resp):
     extract all hyperlinks from the page (if the page is valid) and
     return only those URLs that are considered valid by is_valid.
     """
-    logging.info(f"Scraping URL: {url}")
-    logging.info(f"{stats.get_final_statistics()}")
+    logger.info("Scraping URL: %s", url)
+    # get_final_statistics() ranks the whole vocabulary; only build it when it will be logged.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s", stats.get_final_statistics())
     if resp is None or resp.raw_response is None:
-        logging.info(f"Response is None for URL: {url}")
+        logger.info("Response is None for URL: %s", url)
         return []
     if resp.status != 200:
-        logging.info(f"Non-200 status ({resp.status}) for URL: {url}")
+        logger.info("Non-200 status (%s) for URL: %s", resp.status, url)
         return []
     
     html_content = resp.raw_response.content
     if not html_content or len(html_content) < MIN_HTML_SIZE:
-        logging.info(f"Skipping {url} due to low data size ({len(html_content)} bytes).")
+        logger.info("Skipping %s due to low data size (%d bytes).", url, len(html_content))
         return []
     
-    # parse content once.
-    soup = _get_soup(resp)
-    page_text = soup.get_text(separator=" ", strip=True)
-    tokens = tk.tokenize(page_text)
-    
-    # skip pages that have fewer than 50 words.
-    if len(tokens) < MIN_WORD_COUNT:
-        logging.info(f"Skipping {url}: too few words ({len(tokens)} tokens).")
+    # compute checksum of the raw bytes to skip duplicate pages before parsing.
+    checksum = xxhash.xxh3_64(html_content).intdigest()
+    # add() returns True if the checksum was (probably) already present.
+    if PAGE_CHECKSUMS.add(checksum):
+        logger.info("Duplicate page (checksum: %s) detected at URL: %s", checksum, url)
         return []
     
-    # Exact duplicate detection (before computing checksum)
-    if page_text in EXACT_PAGE_CONTENTS:
-        logging.info(f"Exact duplicate page detected at URL: {url}")
+    # Skip pages that are too large.
+    if len(html_content) > LARGE_PAGE_THRESHOLD:
+        logger.info("Skipping %s: page size %d exceeds threshold.", url, len(html_content))
         return []
-    EXACT_PAGE_CONTENTS.add(page_text)
-
-    # compute checksum to avoid duplicate pages.
-    checksum = hashlib.md5(page_text.encode("utf-8")).hexdigest()
-    if checksum in PAGE_CHECKSUMS:
-        logging.info(f"Duplicate page (checksum: {checksum}) detected at URL: {url}")
+    
+    # parse content once; a page that fails to parse must not stop the crawl.
+    try:
+        tokens, valid_links = _parse_page(html_content, url, resp.url)
+    except Exception as e:
+        logger.error("Error parsing page %s: %s", url, e)
         return []
-    PAGE_CHECKSUMS.add(checksum)
     
-    # Skip pages that are too large.
-    if len(html_content) > LARGE_PAGE_THRESHOLD:
-        logging.info(f"Skipping {url}: page size {len(html_content)} exceeds threshold.")
+    # skip pages that have fewer than 50 words.
+    if len(tokens) < MIN_WORD_COUNT:
+        logger.info("Skipping %s: too few words (%d tokens).", url, len(tokens))
         return []
     
     # Update global statistics.
@@ -170,69 +261,94 @@ def scraper(url, resp):
     stats.check_and_update_ics_domain(url)
     stats.update_frequent_words(tokens)
     
-    # Extract links from the page.
-    links = extract_next_links(url, resp)
-    time.sleep(SCRAPER_DELAY)
-    valid_links = [link for link in links if is_valid(link)]
     return valid_links
 
-def extract_next_links(url, resp):
+def _parse_page(html_content, url, base_url):
+    """
+    Parse a page and return (tokens, valid_links). Leaves the global stats
+    and PAGE_CHECKSUMS to the caller.
+    """
+    soup = _get_soup(html_content)
+    tokens = tk.tokenize(soup.get_text(separator=" ", strip=True))
+    if len(tokens) < MIN_WORD_COUNT:
+        return tokens, []
+
+    return tokens, list(_collect_links(url, html_content, base_url, soup))
+
+def extract_next_links(url, resp, soup=None):
     """
-    Extracts and returns a list of hyperlinks from resp.raw_response.content.
+    Extracts and yields the valid hyperlinks from resp.raw_response.content.
+    If soup is given, its tree is reused rather than parsing the page again.
     """
-    extracted_links = []
     if resp.status != 200:
-        return extracted_links
+        return
 
+    html_content = resp.raw_response.content
+    if not html_content or len(html_content) < MIN_HTML_SIZE:
+        logger.info("Skipping link extraction for %s: content too small.", url)
+        return
+
+    yield from _collect_links(url, html_content, resp.url, soup)
+
+def _collect_links(url, html_content, base_url, soup=None):
+    """
+    Yield the unique, defragmented links in the page that pass is_valid,
+    minus self-links. Walks soup if the page has already been parsed.
+    """
     try:
-        html_content = resp.raw_response.content
-        if not html_content or len(html_content) < MIN_HTML_SIZE:
-            logging.info(f"Skipping link extraction for {url}: content too small.")
-            return extracted_links
+        if soup is None:
+            soup = BeautifulSoup(html_content, _HTML_PARSER, parse_only=_A_STRAINER)
 
-        soup = _get_soup(resp)
         seen = set()
-        for tag in soup.find_all("a", href=True):
-            href = tag.get("href")
-            if href:
-                absolute_url = urljoin(resp.url, href)
-                absolute_url, _ = urldefrag(absolute_url)
-                norm = _normalize_url(absolute_url)
-                if norm == _normalize_url(resp.url):
-                    continue  # Skip self-referential links.
-                if norm not in seen:
-                    seen.add(norm)
-                    extracted_links.append(absolute_url)
+        self_norm = _normalize_url(base_url)
+        base = soup.find("base", href=True)
+        if base:
+            try:
+                base_url = urljoin(base_url, base["href"])
+            except ValueError:
+                pass  # malformed <base href>; resolve against the page URL
+
+        for href in _iter_hrefs(soup):
+            # A malformed href (e.g. a broken IPv6 host) only skips itself.
+            try:
+                absolute_url = urljoin(base_url, href).partition("#")[0]
+                parsed = _cached_parse(absolute_url)
+            except ValueError:
+                continue
+            norm = _normalize_url(absolute_url)
+            if norm == self_norm or norm in seen:
+                continue  # Skip self-referential and repeated links.
+            seen.add(norm)
+            if is_valid_parsed(parsed, absolute_url):
+                yield absolute_url
     except Exception as e:
-        logging.error(f"Error parsing page {url}: {e}")
-    
-    return extracted_links
+        logger.error("Error parsing page %s: %s", url, e)
 
 def is_valid(url):
     try:
-        parsed = urlparse(url)
+        parsed = _cached_parse(url)
+    except ValueError as e:
+        logger.error("Error validating URL %s: %s", url, e)
+        return False
+    return is_valid_parsed(parsed, url)
+
+def is_valid_parsed(parsed, url):
+    """is_valid for a URL that has already been parsed with urlparse."""
+    try:
         if parsed.scheme not in {"http", "https"}:
             return False
 
-        # Allowed domains must match exactly.
-        allowed_domains = {"ics.uci.edu", "cs.uci.edu", "informatics.uci.edu", "stat.uci.edu"}
-        if parsed.netloc not in allowed_domains:
+        # Allowed domains and their subdomains.
+        netloc = parsed.netloc
+        if netloc not in _ALLOWED_DOMAINS and not netloc.endswith(_ALLOWED_SUFFIXES):
             return False
 
         # General trap detection: calendars, archives, date-based URLs, etc.
-        if _is_trap_url(url):
+        if _is_trap_url(url, parsed):
             return False
 
-        ext_pattern = re.compile(
-            r".*\.(css|js|bmp|gif|jpe?g|ico"
-            r"|png|tiff?|mid|mp2|mp3|mp4"
-            r"|wav|avi|mov|mpeg|ram|m4v|mkv|ogg|ogv|pdf"
-            r"|ps|eps|tex|ppt|pptx|doc|docx|xls|xlsx|names"
-            r"|data|dat|exe|bz2|tar|msi|bin|7z|psd|dmg|iso"
-            r"|epub|dll|cnf|tgz|sha1"
-            r"|thmx|mso|arff|rtf|jar|csv"
-            r"|rm|smil|wmv|swf|wma|zip|rar|gz)$", re.IGNORECASE)
-        if ext_pattern.match(parsed.path):
+        _, dot, ext = parsed.path.rpartition(".")
+        if dot and ext.lower() in _EXT_SET:
             return False
 
         if parsed.path.count('/') > 10:
@@ -241,5 +357,5 @@ def is_valid(url):
         return True
 
     except Exception as e:
-        logging.error(f"Error validating URL {url}: {e}")
+        logger.error("Error validating URL %s: %s", url, e)
         return False
@@ -1,9 +1,8 @@
 import re
-import sys
 from collections import Counter
 
 # An updated set of stopwords (feel free to adjust)
-STOPWORDS = {
+STOPWORDS = frozenset({
     "a", "about", "above", "after", "again", "against", "all", "almost", "also",
     "am", "an", "and", "any", "are", "aren't", "as", "at", "be", "because", "been",
     "before", "being", "below", "between", "both", "but", "by", "can", "cannot",
@@ -23,7 +22,7 @@ STOPWORDS = {
     "where's", "which", "while", "who", "who's", "whom", "why", "why's", "with",
     "won't", "would", "wouldn't", "you", "you'd", "you'll", "you're", "you've", "your",
     "yours", "yourself", "yourselves"
-}
+})
 
 class Tokenizer:
     def __init__(self):
@@ -35,6 +34,7 @@ class Tokenizer:
             r'[-+]?\d*\.\d+|[-+]?\d+|\b\w+\b', re.UNICODE)
 
     def tokenize(self, text: str):
+        # Works on the in-memory page text: one findall over the whole string.
         tokens = self.pattern.findall(text.lower())
         return [token for token in tokens if len(token) > 1]
 